@@ -2,17 +2,42 @@
 Places Agent - Child Agent 2
 Fetches tourist attractions using Overpass API.
 """
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
-from utils.geocoding import get_coordinates, get_coordinates_with_country
+from utils.cache import SWRCache
+from utils.cancellation import RequestCancelled
+from utils.geocoding import get_coordinates, lookup_coordinates_with_country
+from utils.overpass import EndpointsUnavailable, OverpassClient
+from utils.ranking import RankedPlaces, SEARCH_RADIUS_KM, element_position, haversine_km, score_element
+
+
+# Server-side and HTTP timeout (seconds) of the combined multi-stop query
+STOPS_QUERY_TIMEOUT = 90
+
+# Stops searched concurrently when the combined query fails
+MAX_PARALLEL_STOP_FETCHES = 3
 
 
 class PlacesAgent:
     """Agent responsible for fetching tourist attractions."""
     
-    def __init__(self):
-        self.base_url = "https://overpass-api.de/api/interpreter"
-        self.target_country = None
+    def __init__(self, endpoints: Optional[List[str]] = None):
+        # Queries are hedged across the configured Overpass mirrors
+        self.overpass = OverpassClient(endpoints)
+        self.base_url = self.overpass.endpoints[0].url
+        self.cache = SWRCache("places")
+        # Per-thread request state; the agent is shared across server threads
+        self._local = threading.local()
+    
+    @property
+    def last_result_stale(self) -> bool:
+        """Whether the last get_tourist_places result on this thread was served from stale data."""
+        return getattr(self._local, "stale", False)
+    
+    @last_result_stale.setter
+    def last_result_stale(self, value: bool):
+        self._local.stale = value
     
     def _countries_match(self, country1: str, country2: str) -> bool:
         """Check if two country names refer to the same country."""
@@ -49,237 +74,296 @@ class PlacesAgent:
         
         return False
     
-    def get_tourist_places(self, place_name: str, limit: int = 5) -> Optional[List[str]]:
+    def get_tourist_places(self, place_name: str, limit: int = 5,
+                           category: Optional[str] = None, cancel_token=None) -> Optional[List[str]]:
         """
         Get tourist attractions for a given place.
         
+        Places are scored once when fetched and the ranking is cached, so a
+        different limit or category is answered without another Overpass query.
+        Expired entries are served immediately while a background refresh runs,
+        and last_result_stale is set accordingly.
+        
         Args:
             place_name: Name of the place
             limit: Maximum number of places to return (default: 5)
+            category: Optional filter, one of "parks", "attractions", "historic", "entertainment"
+            cancel_token: Optional token; once set, remaining Overpass queries are skipped
             
         Returns:
             List of tourist place names or None if error
         """
         # First, get coordinates and country for the place
-        coords_info = get_coordinates_with_country(place_name)
-        if not coords_info:
+        coords_result = lookup_coordinates_with_country(place_name)
+        if not coords_result.value:
+            self.last_result_stale = False
             return None
         
-        lat, lon, country = coords_info
-        
-        # Store country for filtering results later
-        self.target_country = country.lower()
-        
-        places = []
-        seen_names = set()
+        key = tuple(coords_result.value)
+        # Only a synchronous fetch belongs to this request; a background refresh
+        # of the shared entry must not stop when this client goes away
+        result = self.cache.get(key, lambda: self._fetch_ranked_places(coords_result.value, cancel_token),
+                                refresh_loader=lambda: self._fetch_ranked_places(coords_result.value))
+        self.last_result_stale = coords_result.stale or result.stale
+        if result.value is None:
+            return None
         
-        # Try multiple search strategies to find well-known attractions
-        # Strategy 1: Search for parks and gardens first (most common tourist spots)
-        parks = self._search_parks_gardens(lat, lon, limit * 2, seen_names)
-        places.extend(parks)
+        places = result.value.top(limit, category)
+        return places if places else None
+    
+    def get_places_for_stops(self, stops: List[tuple], limit: int = 5,
+                             cancel_token=None) -> List[Optional[List[str]]]:
+        """
+        Get tourist attractions for several geocoded stops.
         
-        # Strategy 2: Search for museums, zoos, and major attractions
-        attractions = self._search_tourism_attractions(lat, lon, limit * 2, seen_names)
-        places.extend(attractions)
+        Stops already in the places cache are served from it. All the others
+        are searched with a single Overpass query holding one `around` clause
+        per stop; each element is assigned to its nearest stop, scored, and the
+        rankings are cached per stop exactly as get_tourist_places would. If the
+        combined query fails, each stop is searched on its own instead.
         
-        # Strategy 3: Search for historic sites and monuments
-        historic = self._search_historic_sites(lat, lon, limit * 2, seen_names)
-        places.extend(historic)
+        Args:
+            stops: List of (latitude, longitude, country) tuples
+            limit: Maximum number of places per stop (default: 5)
+            cancel_token: Optional token; once set, the Overpass query is abandoned
+            
+        Returns:
+            List of place name lists (None where nothing was found), in input order
+        """
+        rankings = [None] * len(stops)
+        missing = []
+        for i, stop in enumerate(stops):
+            key = tuple(stop)
+            if self.cache.contains(key):
+                rankings[i] = self.cache.get(key, lambda stop=stop: self._fetch_ranked_places(stop)).value
+            else:
+                missing.append(i)
         
-        # Strategy 4: Broader search for any leisure or amenity
-        additional = self._get_additional_places(lat, lon, limit * 2, seen_names)
-        places.extend(additional)
+        if missing:
+            fetched = self._fetch_ranked_places_for_stops([stops[i] for i in missing], cancel_token)
+            for i, ranked in zip(missing, fetched):
+                if ranked:
+                    ranked = ranked.trimmed()
+                    self.cache.put(tuple(stops[i]), ranked)
+                    rankings[i] = ranked
         
-        # Remove duplicates and sort by priority, then return top results
-        unique_places = []
-        seen = set()
-        for place in places:
-            if place not in seen:
-                unique_places.append(place)
-                seen.add(place)
+        return [(ranked.top(limit) or None) if ranked else None for ranked in rankings]
+    
+    def _fetch_ranked_places_for_stops(self, stops: List[tuple], cancel_token=None) -> List[RankedPlaces]:
+        """Search around all stops with one Overpass query and rank places per stop."""
+        rankings = [RankedPlaces() for _ in stops]
+        try:
+            data = self.overpass.query(self._stops_query(stops), cancel_token, timeout=STOPS_QUERY_TIMEOUT)
+        except RequestCancelled:
+            # Partial results must not be cached
+            return [None] * len(stops)
+        except EndpointsUnavailable as e:
+            # Per-stop queries would be refused by the same open circuits
+            print(f"Query execution error: {e}")
+            return [None] * len(stops)
+        except Exception as e:
+            print(f"Query execution error: {e}")
+            # The combined query is the heaviest one; smaller per-stop queries may still succeed
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_STOP_FETCHES, len(stops))) as executor:
+                return list(executor.map(lambda stop: self._fetch_ranked_places(stop, cancel_token), stops))
         
-        # Sort by length and keywords (prioritize well-known places)
-        def place_priority(name):
-            priority = 0
-            name_lower = name.lower()
-            # Filter out hotels and non-tourist places
-            exclude_keywords = ["hotel", "restaurant", "mall", "shopping", "resort", "inn", "lodge", "apartment"]
-            if any(keyword in name_lower for keyword in exclude_keywords):
-                return -100  # Heavily penalize these
-            
-            # Prioritize places with common tourist attraction keywords
-            high_priority_keywords = ["national park", "palace", "planetarium"]
-            medium_priority_keywords = ["museum", "zoo", "garden", "park"]
+        for element in data.get("elements", []):
+            tags = element.get("tags", {})
+            position = element_position(element)
+            categories = self._element_categories(tags)
+            if not position or not categories:
+                continue
             
-            for keyword in high_priority_keywords:
-                if keyword in name_lower:
-                    priority += 20
-            for keyword in medium_priority_keywords:
-                if keyword in name_lower:
-                    priority += 10
+            # Assign the element to its nearest stop within the search radius
+            distances = [haversine_km(lat, lon, *position) for lat, lon, _ in stops]
+            nearest = min(range(len(stops)), key=distances.__getitem__)
+            if distances[nearest] > SEARCH_RADIUS_KM:
+                continue
+            if not self._is_tourist_place(tags, stops[nearest][2].lower()):
+                continue
             
-            # Longer names often indicate specific places
-            if len(name.split()) > 1:
-                priority += 5
-            return priority
+            score = score_element(tags, distances[nearest])
+            for category in categories:
+                rankings[nearest].add(tags["name"], category, score)
+        
+        return rankings
+    
+    def _element_categories(self, tags: dict) -> List[str]:
+        """Get every search category an element would have been found by."""
+        categories = []
+        if tags.get("leisure") in ["park", "garden"]:
+            categories.append("parks")
+        if "tourism" in tags:
+            categories.append("attractions")
+        if "historic" in tags:
+            categories.append("historic")
+        if tags.get("amenity") in ["theatre", "cinema", "stadium", "planetarium"]:
+            categories.append("entertainment")
+        return categories
+    
+    def _stops_query(self, stops: List[tuple]) -> str:
+        """Build one query covering every category around every stop."""
+        clauses = []
+        for lat, lon, _ in stops:
+            around = f"(around:25000,{lat},{lon})"
+            clauses.extend([
+                f'  nwr["leisure"~"^(park|garden)$"]{around};',
+                f'  nwr["tourism"]{around};',
+                f'  nwr["historic"]{around};',
+                f'  nwr["amenity"~"^(theatre|cinema|stadium|planetarium)$"]{around};',
+            ])
+        body = "\n".join(clauses)
+        return f"""[out:json][timeout:{STOPS_QUERY_TIMEOUT}];
+(
+{body}
+);
+out center;"""
+    
+    def _fetch_ranked_places(self, coords_info: tuple, cancel_token=None) -> Optional[RankedPlaces]:
+        """Query Overpass for the tourist attractions around a geocoded place and score them."""
+        lat, lon, country = coords_info
+        country = country.lower()
+        ranked = RankedPlaces()
         
-        unique_places.sort(key=place_priority, reverse=True)
+        # Try multiple search strategies to find well-known attractions:
+        # parks and gardens (most common tourist spots), museums, zoos and major
+        # attractions, historic sites and monuments, then a broader amenity search
+        searches = [
+            ("parks", self._parks_gardens_query(lat, lon)),
+            ("attractions", self._tourism_attractions_query(lat, lon)),
+            ("historic", self._historic_sites_query(lat, lon)),
+            ("entertainment", self._additional_places_query(lat, lon)),
+        ]
+        for category, query in searches:
+            try:
+                succeeded = self._execute_query(query, category, lat, lon, country, ranked, cancel_token)
+            except RequestCancelled:
+                # Partial results must not be cached
+                return None
+            if not succeeded:
+                # Nor a ranking missing a category: the cache keeps serving the
+                # previous (stale) ranking rather than this partial one as fresh
+                return None
         
-        return unique_places[:limit] if unique_places else None
+        if not ranked:
+            return None
+        return ranked.trimmed()
     
-    def _search_parks_gardens(self, lat: float, lon: float, limit: int, seen_names: set) -> List[str]:
-        """Search for parks and gardens - most common tourist attractions."""
+    def _parks_gardens_query(self, lat: float, lon: float) -> str:
+        """Build the query for parks and gardens - most common tourist attractions."""
         # Reduced radius to 25km to avoid picking up places from neighboring countries
-        query = f"""[out:json][timeout:30];
+        return f"""[out:json][timeout:30];
 (
   node["leisure"~"^(park|garden)$"](around:25000,{lat},{lon});
   way["leisure"~"^(park|garden)$"](around:25000,{lat},{lon});
   relation["leisure"~"^(park|garden)$"](around:25000,{lat},{lon});
 );
-out body;
->;
-out skel qt;"""
-        
-        return self._execute_query(query, limit, seen_names)
+out center;"""
     
-    def _search_tourism_attractions(self, lat: float, lon: float, limit: int, seen_names: set) -> List[str]:
-        """Search for tourism attractions like museums, zoos, etc."""
+    def _tourism_attractions_query(self, lat: float, lon: float) -> str:
+        """Build the query for tourism attractions like museums, zoos, etc."""
         # Reduced radius to 25km to avoid picking up places from neighboring countries
-        query = f"""[out:json][timeout:30];
+        return f"""[out:json][timeout:30];
 (
   node["tourism"](around:25000,{lat},{lon});
   way["tourism"](around:25000,{lat},{lon});
   relation["tourism"](around:25000,{lat},{lon});
 );
-out body;
->;
-out skel qt;"""
-        
-        return self._execute_query(query, limit, seen_names)
+out center;"""
     
-    def _search_historic_sites(self, lat: float, lon: float, limit: int, seen_names: set) -> List[str]:
-        """Search for historic sites and monuments."""
+    def _historic_sites_query(self, lat: float, lon: float) -> str:
+        """Build the query for historic sites and monuments."""
         # Reduced radius to 25km to avoid picking up places from neighboring countries
-        query = f"""[out:json][timeout:30];
+        return f"""[out:json][timeout:30];
 (
   node["historic"](around:25000,{lat},{lon});
   way["historic"](around:25000,{lat},{lon});
   relation["historic"](around:25000,{lat},{lon});
 );
-out body;
->;
-out skel qt;"""
+out center;"""
+    
+    def _is_foreign(self, tags: dict, target_country: str) -> bool:
+        """Check whether an element's address places it in a different country."""
+        element_country = tags.get("addr:country", "")
+        
+        # Also check is_in field which sometimes has country info
+        if not element_country:
+            is_in = tags.get("is_in", "")
+            if is_in:
+                # Extract country from is_in (format: "city, state, country")
+                parts = [p.strip() for p in is_in.split(",")]
+                if parts:
+                    element_country = parts[-1]  # Last part is usually country
+        
+        # If no country info in element, allow it (many OSM elements don't have country tags)
+        # The search radius (25km) should be sufficient to keep results in the same country
+        if not element_country:
+            return False
         
-        return self._execute_query(query, limit, seen_names)
+        element_normalized = element_country.lower().strip()
+        target_normalized = target_country.lower().strip()
+        if target_normalized == element_normalized:
+            return False
+        # Allow if country names are similar (e.g., "United States" vs "USA")
+        return not self._countries_match(target_normalized, element_normalized)
     
-    def _execute_query(self, query: str, limit: int, seen_names: set) -> List[str]:
-        """Execute an Overpass query and extract place names."""
-        places = []
+    def _execute_query(self, query: str, category: str, lat: float, lon: float,
+                       target_country: str, ranked: RankedPlaces, cancel_token=None) -> bool:
+        """
+        Execute an Overpass query and add the scored places to the ranking.
+        
+        Returns:
+            True if the query succeeded (even with no places), False if it failed
+        """
+        if cancel_token is not None and cancel_token.is_set():
+            raise RequestCancelled("Places search cancelled")
         try:
-            response = requests.post(
-                self.base_url,
-                data={"data": query},
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "elements" in data:
-                # Sort elements by importance (prefer places with more tags/info)
-                elements = sorted(data["elements"], key=lambda x: len(x.get("tags", {})), reverse=True)
-                
-                for element in elements:
-                    if "tags" in element and "name" in element["tags"]:
-                        name = element["tags"]["name"]
-                        if name and name not in seen_names:
-                            # Filter out hotels, restaurants, and non-tourist places
-                            name_lower = name.lower()
-                            exclude_keywords = ["hotel", "restaurant", "mall", "shopping", "resort", "inn", "lodge", "apartment", "residential"]
-                            if any(keyword in name_lower for keyword in exclude_keywords):
-                                continue
-                            
-                            # Skip if it's tagged as accommodation
-                            if element["tags"].get("tourism") in ["hotel", "hostel", "apartment", "guest_house"]:
-                                continue
-                            
-                            # Verify country if available (filter out places from wrong country)
-                            # This ensures we only get places from the same country as the queried location
-                            if hasattr(self, 'target_country') and self.target_country:
-                                element_country = element["tags"].get("addr:country", "")
-                                
-                                # Also check is_in field which sometimes has country info
-                                if not element_country:
-                                    is_in = element["tags"].get("is_in", "")
-                                    if is_in:
-                                        # Extract country from is_in (format: "city, state, country")
-                                        parts = [p.strip() for p in is_in.split(",")]
-                                        if parts:
-                                            element_country = parts[-1]  # Last part is usually country
-                                
-                                # If country info is available and doesn't match, skip
-                                if element_country:
-                                    element_country = element_country.lower()
-                                    # Normalize country names for comparison
-                                    target_normalized = self.target_country.lower().strip()
-                                    element_normalized = element_country.strip()
-                                    
-                                    # Skip if countries don't match
-                                    if target_normalized != element_normalized:
-                                        # Allow if country names are similar (e.g., "United States" vs "USA")
-                                        if not self._countries_match(target_normalized, element_normalized):
-                                            continue
-                                # If no country info in element, allow it (many OSM elements don't have country tags)
-                                # The search radius (25km) should be sufficient to keep results in the same country
-                            
-                            # Prioritize well-known places
-                            priority = 0
-                            if "tourism" in element["tags"]:
-                                tourism_type = element["tags"].get("tourism", "")
-                                if tourism_type in ["attraction", "museum", "zoo", "theme_park", "gallery"]:
-                                    priority += 20
-                                elif tourism_type in ["monument", "viewpoint"]:
-                                    priority += 15
-                                else:
-                                    priority += 5
-                            
-                            # Boost priority for specific keywords
-                            if any(keyword in name_lower for keyword in ["national park", "palace", "planetarium"]):
-                                priority += 15
-                            elif any(keyword in name_lower for keyword in ["park", "garden", "museum", "zoo"]):
-                                priority += 10
-                            
-                            if len(name.split()) > 1:  # Multi-word names are often specific places
-                                priority += 3
-                            
-                            places.append((priority, name))
-                            seen_names.add(name)
-                            if len(places) >= limit * 3:  # Get more candidates to sort
-                                break
-                
-                # Sort by priority and return top results
-                places.sort(key=lambda x: x[0], reverse=True)
-                return [name for _, name in places[:limit]]
-            
+            data = self.overpass.query(query, cancel_token)
+        except RequestCancelled:
+            raise
         except Exception as e:
             print(f"Query execution error: {e}")
+            return False
         
-        return []
+        for element in data.get("elements", []):
+            tags = element.get("tags", {})
+            if not self._is_tourist_place(tags, target_country):
+                continue
+            
+            position = element_position(element)
+            distance = haversine_km(lat, lon, *position) if position else None
+            ranked.add(tags["name"], category, score_element(tags, distance))
+        return True
+    
+    def _is_tourist_place(self, tags: dict, target_country: str) -> bool:
+        """Check whether a named element is a tourist place in the target country."""
+        name = tags.get("name")
+        if not name:
+            return False
+        
+        # Filter out hotels, restaurants, and non-tourist places
+        name_lower = name.lower()
+        exclude_keywords = ["hotel", "restaurant", "mall", "shopping", "resort", "inn", "lodge", "apartment", "residential"]
+        if any(keyword in name_lower for keyword in exclude_keywords):
+            return False
+        
+        # Skip if it's tagged as accommodation
+        if tags.get("tourism") in ["hotel", "hostel", "apartment", "guest_house"]:
+            return False
+        
+        # Verify country if available (filter out places from wrong country)
+        return not (target_country and self._is_foreign(tags, target_country))
     
-    def _get_additional_places(self, lat: float, lon: float, limit: int, seen_names: set) -> List[str]:
-        """Get additional places using a broader search."""
+    def _additional_places_query(self, lat: float, lon: float) -> str:
+        """Build the query for additional places using a broader search."""
         # Reduced radius to 25km to avoid picking up places from neighboring countries
-        query = f"""[out:json][timeout:30];
+        return f"""[out:json][timeout:30];
 (
   node["amenity"~"^(theatre|cinema|stadium|planetarium)$"](around:25000,{lat},{lon});
   way["amenity"~"^(theatre|cinema|stadium|planetarium)$"](around:25000,{lat},{lon});
   relation["amenity"~"^(theatre|cinema|stadium|planetarium)$"](around:25000,{lat},{lon});
 );
-out body;
->;
-out skel qt;"""
-        
-        return self._execute_query(query, limit, seen_names)
+out center;"""
     
     def format_places_response(self, place_name: str, places: List[str]) -> str:
         """
@@ -2,11 +2,52 @@
 Tourism AI Agent - Parent Agent
 Orchestrates the child agents (Weather Agent and Places Agent).
 """
+import calendar
 import re
-from typing import Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
 from agents.weather_agent import WeatherAgent
 from agents.places_agent import PlacesAgent
-from utils.geocoding import get_coordinates
+from utils.forecast import MAX_FORECAST_DAYS
+from utils.geocoding import lookup_coordinates, lookup_place
+from utils.routing import distance_matrix, nearest_neighbor_route
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+# Full month names or their exact abbreviations ("mar", "march", but not "marvellous")
+MONTH_NAMES = (r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+               r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?")
+MONTH_PATTERN = rf"({MONTH_NAMES})\b"
+# A date phrase trailing a place name ("Bangalore next week", "Mysore on Friday")
+TRAILING_DATE_PHRASE = re.compile(
+    r"\s+(?:(?:next|this|coming)\s+(?:week|weekend|month|\d+\s+days|" + '|'.join(WEEKDAYS) + r")"
+    r"|(?:on|in|from|during)\s+(?:" + '|'.join(WEEKDAYS) + r"|" + MONTH_NAMES + r"|\d)"
+    r"|(?:for|in)\s+\d+\s+days|day after tomorrow|today|tomorrow|tonight)\b",
+    re.IGNORECASE
+)
+# Capitalized date words that must not be mistaken for place names
+DATE_WORDS = (set(calendar.day_name) | set(calendar.month_name[1:]) | set(calendar.month_abbr[1:]) |
+              {'Today', 'Tomorrow', 'Tonight', 'Next', 'This', 'Weekend'})
+# Capitalized words that start sentences or questions rather than name places
+NON_PLACE_WORDS = DATE_WORDS | {
+    'I', 'I\'m', 'I\'ll', 'Let', 'Let\'s', 'What', 'What\'s', 'The', 'And', 'Are', 'Can', 'Go', 'To', 'In',
+    'How', 'Where', 'Which', 'When', 'Will', 'Is', 'We', 'We\'re', 'My', 'Our', 'Plan', 'Please',
+    'Tell', 'Show', 'Give', 'Hi', 'Hello', 'Then', 'From', 'Also', 'Visit', 'Trip', 'Weather',
+    'Going', 'Heading', 'Travelling', 'Traveling', 'Flying', 'Driving', 'Visiting', 'Planning'
+}
+# Text allowed between two destinations of an itinerary ("A, B and C", "A to B then C")
+DESTINATION_SEPARATOR = re.compile(r"^\s*(?:,|&|/|->|→|,?\s*(?:and|then|to|and then)\b)\s*$", re.IGNORECASE)
+# Separators that mark a route rather than a qualifier list ("Paris, France")
+ITINERARY_CUE = re.compile(r"\b(?:and|then)\b|->|→", re.IGNORECASE)
+# Nominatim address types of regions that may qualify a preceding stop
+REGION_TYPES = {'country', 'state', 'region', 'province', 'state_district'}
+# Most stops resolved concurrently (Nominatim asks for gentle use)
+MAX_PARALLEL_GEOCODES = 4
+# Most stops a single itinerary may plan (each one costs geocoding and Overpass work)
+MAX_ITINERARY_STOPS = 10
 
 
 class TourismAgent:
@@ -15,6 +56,17 @@ class TourismAgent:
     def __init__(self):
         self.weather_agent = WeatherAgent()
         self.places_agent = PlacesAgent()
+        # Staleness flags are per thread, since one agent serves concurrent requests
+        self._local = threading.local()
+    
+    @property
+    def last_response_stale(self) -> bool:
+        """Whether the last response on this thread used data past its freshness TTL."""
+        return getattr(self._local, "stale", False)
+    
+    @last_response_stale.setter
+    def last_response_stale(self, value: bool):
+        self._local.stale = value
     
     def extract_place_name(self, user_input: str) -> Optional[str]:
         """
@@ -36,7 +88,7 @@ class TourismAgent:
             capitalized = [w.rstrip(',.?!') for w in words if w and w[0].isupper() and len(w.rstrip(',.!?')) > 2]
             if capitalized:
                 common_words = {'I', 'I\'m', 'Let', 'Let\'s', 'What', 'The', 'And', 'Are', 'Can', 'Go', 'To', 'In'}
-                place_words = [w for w in capitalized if w not in common_words]
+                place_words = [w for w in capitalized if w not in common_words and w not in DATE_WORDS]
                 if place_words:
                     return ' '.join(place_words)
         
@@ -53,6 +105,8 @@ class TourismAgent:
             match = re.search(pattern, user_input, re.IGNORECASE)
             if match:
                 place = match.group(1).strip()
+                # Drop trailing date phrases ("Bangalore next week"), keeping names like "Southend on Sea"
+                place = TRAILING_DATE_PHRASE.split(place)[0]
                 # Clean up common words
                 place = re.sub(r'\b(?:the|a|an)\b', '', place, flags=re.IGNORECASE).strip()
                 if place:
@@ -63,12 +117,310 @@ class TourismAgent:
         if capitalized:
             # Filter out common capitalized words that aren't place names
             common_words = {'I', 'I\'m', 'Let', 'Let\'s', 'What', 'The', 'And', 'Are', 'Can', 'Go', 'To', 'In'}
-            place_words = [w for w in capitalized if w not in common_words]
+            place_words = [w for w in capitalized if w not in common_words and w not in DATE_WORDS]
             if place_words:
                 return ' '.join(place_words[:2])  # Take first 1-2 capitalized words
         
         return None
     
+    def _parse_days(self, text: str, today: date) -> List[date]:
+        """Find ISO dates and day-month / month-day phrases like '20 Oct', in order."""
+        pattern = (r"\b(\d{4})-(\d{2})-(\d{2})\b"
+                   rf"|\b(\d{{1,2}})(?:st|nd|rd|th)?\s+{MONTH_PATTERN}"
+                   rf"|\b{MONTH_PATTERN}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b")
+        
+        days = []
+        for match in re.finditer(pattern, text):
+            year, month, day_of_month, day_a, month_a, month_b, day_b = match.groups()
+            try:
+                if year:
+                    days.append(date(int(year), int(month), int(day_of_month)))
+                    continue
+                month_part, day_part = (month_a, day_a) if day_a else (month_b, day_b)
+                day = date(today.year, MONTHS.index(month_part[:3]) + 1, int(day_part))
+            except ValueError:
+                continue
+            # Dates already past this year refer to next year
+            if day < today:
+                day = day.replace(year=today.year + 1)
+            days.append(day)
+        return days
+    
+    def extract_date_window(self, user_input: str, today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+        """
+        Extract a trip date window from user input.
+        
+        Understands phrases like "today", "tomorrow", "this weekend", "next week",
+        "next 5 days", "in 3 days", "on Friday", "2026-10-20" and "from 20 Oct to 25 Oct".
+        
+        Args:
+            user_input: User's input text
+            today: Reference date (defaults to today)
+            
+        Returns:
+            Tuple of (start, end) dates, inclusive, or None if no date phrase is found
+        """
+        today = today or date.today()
+        text = user_input.lower()
+        window = None
+        
+        # Explicit dates: "20 Oct", or a range like "from 20 Oct to 25 Oct"
+        days = self._parse_days(text, today)
+        if len(days) >= 2 and days[0] <= days[-1]:
+            window = (days[0], days[-1])
+        elif days:
+            window = (days[0], days[0])
+        
+        if window is None:
+            # Trip lengths must be at least one day
+            match = re.search(r"\b(?:next|coming)\s+([1-9]\d?)\s+days\b", text)
+            in_days = re.search(r"\bin\s+(\d{1,2})\s+days\b", text)
+            for_days = re.search(r"\bfor\s+([1-9]\d?)\s+days\b", text)
+            weekday = re.search(r"\b(?:on\s+|this\s+|next\s+)?(" + '|'.join(WEEKDAYS) + r")\b", text)
+            
+            if match:
+                window = (today, today + timedelta(days=int(match.group(1)) - 1))
+            elif 'day after tomorrow' in text:
+                day = today + timedelta(days=2)
+                window = (day, day)
+            elif 'tomorrow' in text:
+                day = today + timedelta(days=1)
+                window = (day, day)
+            elif 'today' in text or 'tonight' in text:
+                window = (today, today)
+            elif 'weekend' in text:
+                # Saturday of the weekend we're in (or the coming one on weekdays)
+                if today.weekday() == 6:
+                    saturday = today - timedelta(days=1)
+                else:
+                    saturday = today + timedelta(days=5 - today.weekday())
+                if 'next weekend' in text:
+                    saturday += timedelta(days=7)
+                # Days of this weekend that have already passed aren't part of the trip
+                window = (max(saturday, today), saturday + timedelta(days=1))
+            elif 'next week' in text:
+                monday = today + timedelta(days=7 - today.weekday())
+                window = (monday, monday + timedelta(days=6))
+            elif 'this week' in text:
+                window = (today, today + timedelta(days=6 - today.weekday()))
+            elif in_days:
+                day = today + timedelta(days=int(in_days.group(1)))
+                window = (day, day)
+            elif weekday:
+                offset = (WEEKDAYS.index(weekday.group(1)) - today.weekday()) % 7
+                if offset == 0 and 'next' in weekday.group(0):
+                    offset = 7
+                day = today + timedelta(days=offset)
+                window = (day, day)
+            
+            # "for N days" stretches a single start day into a trip
+            if window and for_days and window[0] == window[1]:
+                window = (window[0], window[0] + timedelta(days=int(for_days.group(1)) - 1))
+            elif window is None and for_days:
+                window = (today, today + timedelta(days=int(for_days.group(1)) - 1))
+        
+        return window
+    
+    def extract_destinations(self, user_input: str) -> List[str]:
+        """
+        Extract every destination of a multi-stop trip from user input.
+        
+        Destinations are capitalized names joined into a list, as in
+        "Bangalore, Mysore and Ooty" or "Delhi to Agra then Jaipur". Two names
+        only count as a trip when an explicit cue ("and", "then", "->") joins
+        them, so "Paris, France" stays a single destination.
+        
+        Args:
+            user_input: User's input text
+            
+        Returns:
+            Destination names in the order mentioned (empty if not a multi-stop trip)
+        """
+        # Runs of capitalized words are candidate names ("New York")
+        candidates = []
+        for match in re.finditer(r"[A-Z][\w'’-]*(?:\s+[A-Z][\w'’-]*)*", user_input):
+            words = [w.rstrip("'’") for w in match.group(0).split()]
+            start = match.start()
+            # Drop leading sentence words ("And Ooty" -> "Ooty")
+            while words and words[0] in NON_PLACE_WORDS:
+                start = user_input.index(words[0], start) + len(words[0])
+                words.pop(0)
+            words = [w for w in words if w not in NON_PLACE_WORDS]
+            if words and len(words[0]) > 2:
+                candidates.append((' '.join(words), user_input.index(words[0], start), match.end()))
+        
+        # Keep the longest run of candidates separated only by list separators
+        best, run = [], []
+        for name, start, end in candidates:
+            separator = user_input[run[-1][2]:start] if run else ''
+            if run and DESTINATION_SEPARATOR.match(separator):
+                run.append((name, start, end, separator))
+            else:
+                run = [(name, start, end, '')]
+            if len(run) > len(best):
+                best = list(run)
+        
+        destinations = []
+        for name, _, _, _ in best:
+            if name not in destinations:
+                destinations.append(name)
+        
+        has_cue = any(ITINERARY_CUE.search(separator) for _, _, _, separator in best)
+        if len(destinations) >= 3 or (len(destinations) == 2 and has_cue):
+            return destinations
+        return []
+    
+    def itinerary_size_error(self, destinations: List[str]) -> Optional[str]:
+        """
+        Check a trip against the itinerary size limit.
+        
+        Args:
+            destinations: Destination names
+            
+        Returns:
+            Message for the user if the trip has too many destinations, otherwise None
+        """
+        if len(destinations) > MAX_ITINERARY_STOPS:
+            return (f"I can plan at most {MAX_ITINERARY_STOPS} destinations per trip. "
+                    f"Please split your {len(destinations)} destinations into shorter trips.")
+        return None
+    
+    def resolve_destinations(self, destinations: List[str]) -> Tuple[List[Tuple[str, Dict]], List[str]]:
+        """
+        Geocode destinations in parallel, dropping region qualifiers.
+        
+        A destination that geocodes to a country or region containing the
+        previous stop ("Paris, France and Rome") qualifies that stop rather
+        than being a stop of its own, so it is dropped.
+        
+        Args:
+            destinations: Destination names in the order mentioned
+            
+        Returns:
+            Tuple of (resolved, unresolved): resolved is a list of (name, place
+            details) and unresolved the names that could not be geocoded
+        """
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_GEOCODES, len(destinations) or 1)) as executor:
+            lookups = list(executor.map(lookup_place, destinations))
+        self.last_response_stale = any(lookup.stale for lookup in lookups)
+        
+        resolved, unresolved = [], []
+        for name, lookup in zip(destinations, lookups):
+            place = lookup.value
+            if not place:
+                unresolved.append(name)
+                continue
+            if resolved and self._contains(place, resolved[-1][1]):
+                continue
+            resolved.append((name, place))
+        return resolved, unresolved
+    
+    def _contains(self, region: Dict, place: Dict) -> bool:
+        """Check whether a geocoded region is a country or state that contains a place."""
+        if region["type"] not in REGION_TYPES:
+            return False
+        if region["country"] != place["country"]:
+            return False
+        if region["type"] == 'country':
+            return True
+        return bool(region["state"]) and region["state"] == place["state"]
+    
+    def plan_itinerary(self, destinations: List[str], want_weather: bool = True,
+                       want_places: bool = True, cancel_token=None) -> Dict:
+        """
+        Build a multi-destination itinerary.
+        
+        All destinations are geocoded in parallel, places for every stop come
+        from one Overpass query and weather from one multi-coordinate
+        Open-Meteo request. Stops are ordered with a nearest-neighbor route
+        starting at the first destination mentioned.
+        
+        Args:
+            destinations: Destination names
+            want_weather: Whether to include current weather per stop
+            want_places: Whether to include tourist places per stop
+            cancel_token: Optional token; once set, remaining upstream fetches are skipped
+            
+        Returns:
+            Dictionary with "stops" (in route order), "total_distance_km" and
+            "unresolved" (destinations that could not be geocoded)
+            
+        Raises:
+            ValueError: If there are more than MAX_ITINERARY_STOPS destinations
+        """
+        error = self.itinerary_size_error(destinations)
+        if error:
+            raise ValueError(error)
+        
+        resolved, unresolved = self.resolve_destinations(destinations)
+        return self._plan_resolved(resolved, unresolved, want_weather, want_places, cancel_token)
+    
+    def _plan_resolved(self, resolved: List[Tuple[str, Dict]], unresolved: List[str],
+                       want_weather: bool, want_places: bool, cancel_token=None) -> Dict:
+        """Build the itinerary for already geocoded destinations."""
+        resolved = [(name, (place["latitude"], place["longitude"], place["country"]))
+                    for name, place in resolved]
+        itinerary = {"stops": [], "total_distance_km": 0.0, "unresolved": unresolved}
+        if not resolved or (cancel_token is not None and cancel_token.is_set()):
+            return itinerary
+        
+        matrix = distance_matrix([(lat, lon) for _, (lat, lon, _) in resolved])
+        route = nearest_neighbor_route(matrix)
+        ordered = [resolved[i] for i in route]
+        
+        weather = [None] * len(ordered)
+        if want_weather:
+            weather = self.weather_agent.get_weather_many([(lat, lon) for _, (lat, lon, _) in ordered])
+            self.last_response_stale = self.last_response_stale or any(w and w.get("stale") for w in weather)
+        
+        places = [None] * len(ordered)
+        if want_places and not (cancel_token is not None and cancel_token.is_set()):
+            places = self.places_agent.get_places_for_stops([info for _, info in ordered], cancel_token=cancel_token)
+        
+        for position, (name, (lat, lon, country)) in enumerate(ordered):
+            distance = matrix[route[position - 1]][route[position]] if position else 0.0
+            itinerary["total_distance_km"] += distance
+            itinerary["stops"].append({
+                "name": name,
+                "latitude": lat,
+                "longitude": lon,
+                "country": country,
+                "distance_km": round(distance, 1),
+                "weather": weather[position],
+                "places": places[position]
+            })
+        itinerary["total_distance_km"] = round(itinerary["total_distance_km"], 1)
+        return itinerary
+    
+    def format_itinerary_response(self, itinerary: Dict) -> str:
+        """
+        Format an itinerary into a user-friendly response.
+        
+        Args:
+            itinerary: Itinerary from plan_itinerary
+            
+        Returns:
+            Formatted string response
+        """
+        stops = itinerary["stops"]
+        if not stops:
+            return "I don't know these places exist. Could you please check the spelling of your destinations?"
+        
+        lines = [f"Here is your trip in route order (about {itinerary['total_distance_km']:.0f} km in total):"]
+        for number, stop in enumerate(stops, 1):
+            heading = f"{number}. {stop['name']}"
+            if number > 1:
+                heading += f" ({stop['distance_km']:.0f} km from {stops[number - 2]['name']})"
+            lines.append(heading)
+            if stop["weather"]:
+                lines.append(self.weather_agent.format_weather_response(stop["name"], stop["weather"]))
+            if stop["places"]:
+                lines.append("Places: " + ", ".join(stop["places"]))
+        
+        if itinerary["unresolved"]:
+            lines.append(f"I couldn't find: {', '.join(itinerary['unresolved'])}.")
+        return "\n".join(lines)
+    
     def determine_intent(self, user_input: str) -> Dict[str, bool]:
         """
         Determine what the user wants: weather, places, or both.
@@ -84,7 +436,7 @@ class TourismAgent:
         # Check for weather-related keywords
         wants_weather = any(keyword in user_lower for keyword in [
             'temperature', 'weather', 'rain', 'temperature there', 'weather there',
-            'temp', 'how hot', 'how cold', 'degrees'
+            'temp', 'how hot', 'how cold', 'degrees', 'forecast'
         ])
         
         # Check for places-related keywords
@@ -109,26 +461,67 @@ class TourismAgent:
             'places': wants_places
         }
     
-    def process_request(self, user_input: str) -> str:
+    def _trip_weather_response(self, place_name: str, coords: Tuple[float, float],
+                               window: Tuple[date, date]) -> Optional[str]:
+        """Build the weather response for a trip window."""
+        start, end = window
+        today = date.today()
+        last_forecast_day = today + timedelta(days=MAX_FORECAST_DAYS - 1)
+        if end < today or start > last_forecast_day:
+            return (f"I can only forecast the weather in {place_name} for the next "
+                    f"{MAX_FORECAST_DAYS} days.")
+        
+        summary = self.weather_agent.get_trip_weather(coords[0], coords[1],
+                                                      max(start, today), min(end, last_forecast_day))
+        if not summary:
+            return None
+        self.last_response_stale = self.last_response_stale or summary.get("stale", False)
+        return self.weather_agent.format_trip_weather_response(place_name, summary)
+    
+    def process_request(self, user_input: str, cancel_token=None) -> str:
         """
         Process user request and coordinate child agents.
         
         Args:
             user_input: User's input text
+            cancel_token: Optional token; once set (the client abandoned the
+                request), remaining upstream fetches are skipped
             
         Returns:
             Formatted response string
         """
+        self.last_response_stale = False
+        
+        # Several destinations switch to itinerary mode
+        destinations = self.extract_destinations(user_input)
+        if destinations:
+            error = self.itinerary_size_error(destinations)
+            if error:
+                return error
+            resolved, unresolved = self.resolve_destinations(destinations)
+            # Fewer than two real stops ("Paris, France and ...") is an ordinary query
+            if len(resolved) + len(unresolved) >= 2:
+                intent = self.determine_intent(user_input)
+                itinerary = self._plan_resolved(resolved, unresolved, intent['weather'],
+                                                intent['places'], cancel_token)
+                return self.format_itinerary_response(itinerary)
+            self.last_response_stale = False
+        
         # Extract place name
         place_name = self.extract_place_name(user_input)
         if not place_name:
             return "I couldn't identify the place you want to visit. Please specify a place name."
         
         # Verify place exists by trying to get coordinates
-        coords = get_coordinates(place_name)
+        coords_result = lookup_coordinates(place_name)
+        coords = coords_result.value
         if not coords:
             return f"I don't know this place exists. Could you please check the spelling or provide more details about the location?"
         
+        self.last_response_stale = coords_result.stale
+        if cancel_token is not None and cancel_token.is_set():
+            return "Request cancelled."
+        
         # Determine user intent
         intent = self.determine_intent(user_input)
         
@@ -136,15 +529,27 @@ class TourismAgent:
         
         # Get weather information if requested
         if intent['weather']:
-            weather_data = self.weather_agent.get_weather(coords[0], coords[1])
-            if weather_data:
-                weather_response = self.weather_agent.format_weather_response(place_name, weather_data)
-                responses.append(weather_response)
+            # A date phrase switches from current weather to the trip-window forecast
+            window = self.extract_date_window(user_input)
+            if window:
+                weather_response = self._trip_weather_response(place_name, coords, window)
+                if weather_response:
+                    responses.append(weather_response)
+            else:
+                weather_data = self.weather_agent.get_weather(coords[0], coords[1])
+                if weather_data:
+                    self.last_response_stale = self.last_response_stale or weather_data.get("stale", False)
+                    weather_response = self.weather_agent.format_weather_response(place_name, weather_data)
+                    responses.append(weather_response)
+        
+        if cancel_token is not None and cancel_token.is_set():
+            return "Request cancelled."
         
         # Get places information if requested
         if intent['places']:
-            places = self.places_agent.get_tourist_places(place_name)
+            places = self.places_agent.get_tourist_places(place_name, cancel_token=cancel_token)
             if places:
+                self.last_response_stale = self.last_response_stale or self.places_agent.last_result_stale
                 places_response = self.places_agent.format_places_response(place_name, places)
                 responses.append(places_response)
         
@@ -3,7 +3,10 @@ Weather Agent - Child Agent 1
 Fetches current weather and forecast using Open-Meteo API.
 """
 import requests
-from typing import Optional, Dict, Tuple
+from datetime import date
+from typing import Optional, Dict, List, Tuple
+from utils.cache import SWRCache
+from utils.forecast import ForecastSeries, MAX_FORECAST_DAYS
 
 
 class WeatherAgent:
@@ -11,11 +14,17 @@ class WeatherAgent:
     
     def __init__(self):
         self.base_url = "https://api.open-meteo.com/v1/forecast"
+        self.cache = SWRCache("weather")
+        self.forecast_cache = SWRCache("forecast")
     
     def get_weather(self, latitude: float, longitude: float) -> Optional[Dict]:
         """
         Get current weather and forecast for given coordinates.
         
+        Results are cached per ~100m grid cell. Expired entries are served
+        immediately with "stale" and "age_seconds" set while a background
+        refresh runs.
+        
         Args:
             latitude: Latitude of the location
             longitude: Longitude of the location
@@ -23,9 +32,60 @@ class WeatherAgent:
         Returns:
             Dictionary with weather information or None if error
         """
+        key = (round(latitude, 3), round(longitude, 3))
+        result = self.cache.get(key, lambda: self._fetch_weather(latitude, longitude))
+        if result.value is None:
+            return None
+        return self._with_staleness(result.value, result.stale, result.age)
+    
+    def get_weather_many(self, coordinates: List[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """
+        Get current weather for several locations.
+        
+        Locations already in the cache are served from it; all the others are
+        fetched together in a single multi-coordinate Open-Meteo request.
+        
+        Args:
+            coordinates: List of (latitude, longitude) tuples
+            
+        Returns:
+            List of weather dictionaries (None where unavailable), in input order
+        """
+        results = [None] * len(coordinates)
+        missing = []
+        for i, (latitude, longitude) in enumerate(coordinates):
+            key = (round(latitude, 3), round(longitude, 3))
+            if self.cache.contains(key):
+                results[i] = self.get_weather(latitude, longitude)
+            else:
+                missing.append(i)
+        
+        if missing:
+            fetched = self._fetch_weather_many([coordinates[i] for i in missing])
+            for i, weather in zip(missing, fetched):
+                if weather is not None:
+                    latitude, longitude = coordinates[i]
+                    self.cache.put((round(latitude, 3), round(longitude, 3)), weather)
+                    results[i] = self._with_staleness(weather, False, 0.0)
+        
+        return results
+    
+    def _with_staleness(self, weather: Dict, stale: bool, age: float) -> Dict:
+        """Copy cached weather data, adding its staleness."""
+        weather = dict(weather)
+        weather["stale"] = stale
+        weather["age_seconds"] = age
+        return weather
+    
+    def _fetch_weather(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """Fetch current weather from Open-Meteo."""
+        return self._fetch_weather_many([(latitude, longitude)])[0]
+    
+    def _fetch_weather_many(self, coordinates: List[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """Fetch current weather for several locations in one Open-Meteo request."""
         params = {
-            "latitude": latitude,
-            "longitude": longitude,
+            "latitude": ",".join(str(latitude) for latitude, _ in coordinates),
+            "longitude": ",".join(str(longitude) for _, longitude in coordinates),
             "current": "temperature_2m,precipitation_probability",
             "forecast_days": 1
         }
@@ -35,15 +95,78 @@ class WeatherAgent:
             response.raise_for_status()
             data = response.json()
             
-            if "current" in data:
-                return {
-                    "temperature": data["current"].get("temperature_2m"),
-                    "precipitation_probability": data["current"].get("precipitation_probability"),
-                    "unit": data["current_units"].get("temperature_2m", "°C")
-                }
-            return None
+            # A single location comes back as an object, several as a list
+            locations = data if isinstance(data, list) else [data]
+            results = []
+            for location in locations:
+                if "current" in location:
+                    results.append({
+                        "temperature": location["current"].get("temperature_2m"),
+                        "precipitation_probability": location["current"].get("precipitation_probability"),
+                        "unit": location["current_units"].get("temperature_2m", "°C")
+                    })
+                else:
+                    results.append(None)
+            return results if len(results) == len(coordinates) else [None] * len(coordinates)
         except Exception as e:
             print(f"Weather API error: {e}")
+            return [None] * len(coordinates)
+    
+    def get_trip_weather(self, latitude: float, longitude: float,
+                         start: date, end: date) -> Optional[Dict]:
+        """
+        Get a weather summary for a trip window of up to 16 days.
+        
+        The full 16-day daily and hourly series is fetched in one request and
+        cached, so any sub-window is answered without another upstream call.
+        
+        Args:
+            latitude: Latitude of the location
+            longitude: Longitude of the location
+            start: First day of the trip
+            end: Last day of the trip (inclusive)
+            
+        Returns:
+            Dictionary with the trip weather summary or None if error
+        """
+        key = (round(latitude, 3), round(longitude, 3))
+        result = self.forecast_cache.get(key, lambda: self._fetch_forecast(latitude, longitude))
+        series = result.value
+        if series is None:
+            return None
+        
+        # Clip to the days the series covers (a stale series may start in the past)
+        start = max(start, series.start)
+        end = min(end, series.end)
+        if start > end:
+            return None
+        
+        summary = series.summarize(start, end)
+        summary["stale"] = result.stale
+        summary["age_seconds"] = result.age
+        return summary
+    
+    def _fetch_forecast(self, latitude: float, longitude: float) -> Optional[ForecastSeries]:
+        """Fetch the 16-day daily and hourly forecast from Open-Meteo."""
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,precipitation_sum",
+            "hourly": "precipitation",
+            "timezone": "auto",
+            "forecast_days": MAX_FORECAST_DAYS
+        }
+        
+        try:
+            response = requests.get(self.base_url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            
+            if "daily" in data and "hourly" in data:
+                return ForecastSeries(data)
+            return None
+        except Exception as e:
+            print(f"Forecast API error: {e}")
             return None
     
     def format_weather_response(self, place_name: str, weather_data: Dict) -> str:
@@ -64,5 +187,53 @@ class WeatherAgent:
         rain_chance = weather_data.get("precipitation_probability", 0)
         unit = weather_data.get("unit", "°C")
         
+        if weather_data.get("stale"):
+            minutes = max(1, int(weather_data.get("age_seconds", 0) // 60))
+            return (f"In {place_name} it was {temp}{unit} with a chance of {rain_chance}% to rain "
+                    f"(as of {minutes} minutes ago).")
+        
         return f"In {place_name} it's currently {temp}{unit} with a chance of {rain_chance}% to rain."
 
+    
+    def format_trip_weather_response(self, place_name: str, summary: Dict) -> str:
+        """
+        Format a trip weather summary into a user-friendly response.
+        
+        Args:
+            place_name: Name of the place
+            summary: Summary from get_trip_weather
+            
+        Returns:
+            Formatted string response
+        """
+        if not summary:
+            return f"Sorry, I couldn't fetch the forecast for {place_name}."
+        
+        start, end = summary["start"], summary["end"]
+        if start == end:
+            window = f"on {start:%a %d %b}"
+        else:
+            window = f"from {start:%a %d %b} to {end:%a %d %b}"
+        
+        # Either bound is None when the forecast has no values for the window
+        unit = summary.get("unit", "°C")
+        temp_min, temp_max = summary.get("temp_min"), summary.get("temp_max")
+        if temp_min is not None and temp_max is not None:
+            temperature = f"{temp_min}{unit} to {temp_max}{unit} with "
+        elif temp_min is not None:
+            temperature = f"lows of {temp_min}{unit} with "
+        elif temp_max is not None:
+            temperature = f"highs of {temp_max}{unit} with "
+        else:
+            temperature = ""
+        response = f"In {place_name} {window} expect {temperature}about {summary['rain_hours']} hours of rain"
+        if summary.get("stale"):
+            hours = max(1, int(summary.get("age_seconds", 0) // 3600))
+            response += f" (forecast from {hours} hours ago)"
+        response += "."
+        
+        if start != end and summary.get("best_days"):
+            best = ", ".join(f"{day:%a %d %b}" for day in summary["best_days"])
+            response += f" Best days: {best}."
+        
+        return response
@@ -2,11 +2,37 @@
 Flask web application for the Multi-Agent Tourism System.
 """
 from flask import Flask, render_template, request, jsonify
-from agents.tourism_agent import TourismAgent
+from utils.cancellation import CancelToken, TooManyCancels, cancel_request
+import hashlib
+import json
+import os
 import sys
+import threading
 
 app = Flask(__name__)
-agent = TourismAgent()
+
+# The agent (and everything it loads) is built on first use, or once in the
+# gunicorn master when PRELOAD_AGENT=1 so forked workers share its memory.
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent():
+    """Get the shared TourismAgent, constructing it on first use."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                from agents.tourism_agent import TourismAgent
+                _agent = TourismAgent()
+    return _agent
+
+
+if os.environ.get('PRELOAD_AGENT') == '1':
+    get_agent()
+
+# How long browsers may reuse an answer without asking again (seconds)
+QUERY_MAX_AGE = 300
 
 @app.route('/')
 def index():
@@ -15,7 +41,14 @@ def index():
 
 @app.route('/api/query', methods=['POST'])
 def process_query():
-    """Process user query and return response."""
+    """
+    Process user query and return response.
+    
+    The client may send an X-Request-ID header so the request can later be
+    cancelled through /api/cancel, and If-None-Match with the ETag of a cached
+    answer to get a 304 when the answer hasn't changed.
+    """
+    cancel_token = CancelToken(request.headers.get('X-Request-ID', ''))
     try:
         data = request.get_json()
         user_input = data.get('query', '').strip()
@@ -27,11 +60,83 @@ def process_query():
             }), 400
         
         # Process the query using the tourism agent
-        response = agent.process_request(user_input)
+        agent = get_agent()
+        response = agent.process_request(user_input, cancel_token=cancel_token)
+        
+        payload = {
+            'success': True,
+            'response': response,
+            # True when an upstream failed and cached data past its TTL was used
+            'stale': agent.last_response_stale
+        }
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        # Stale answers may be reused, but only after checking for a fresher one
+        cache_control = 'private, no-cache' if payload['stale'] else f'private, max-age={QUERY_MAX_AGE}'
+        
+        if etag in request.if_none_match:
+            result = app.response_class(status=304)
+        else:
+            result = jsonify(payload)
+        result.set_etag(etag)
+        result.headers['Cache-Control'] = cache_control
+        return result
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        }), 500
+    finally:
+        cancel_token.release()
+
+@app.route('/api/itinerary', methods=['POST'])
+def process_itinerary():
+    """
+    Plan a multi-destination trip.
+    
+    Accepts either a list of "destinations" or a free-text "query" naming
+    several stops, and returns the stops in route order with their weather
+    and tourist places.
+    """
+    cancel_token = CancelToken(request.headers.get('X-Request-ID', ''))
+    try:
+        data = request.get_json()
+        agent = get_agent()
+        
+        destinations = data.get('destinations', [])
+        if not isinstance(destinations, list):
+            return jsonify({
+                'success': False,
+                'error': '"destinations" must be a list of place names.'
+            }), 400
+        
+        destinations = [str(d).strip() for d in destinations if str(d).strip()]
+        if not destinations and isinstance(data.get('query'), str):
+            destinations = agent.extract_destinations(data['query'].strip())
+        if not destinations:
+            return jsonify({
+                'success': False,
+                'error': 'Please name the destinations of your trip.'
+            }), 400
+        size_error = agent.itinerary_size_error(destinations)
+        if size_error:
+            return jsonify({
+                'success': False,
+                'error': size_error
+            }), 400
+        
+        itinerary = agent.plan_itinerary(
+            destinations,
+            want_weather=bool(data.get('weather', True)),
+            want_places=bool(data.get('places', True)),
+            cancel_token=cancel_token
+        )
         
         return jsonify({
             'success': True,
-            'response': response
+            'response': agent.format_itinerary_response(itinerary),
+            'itinerary': itinerary,
+            'stale': agent.last_response_stale
         })
     
     except Exception as e:
@@ -39,6 +144,27 @@ def process_query():
             'success': False,
             'error': f'An error occurred: {str(e)}'
         }), 500
+    finally:
+        cancel_token.release()
+
+@app.route('/api/cancel', methods=['POST'])
+def cancel_query():
+    """Cancel an in-flight query abandoned by the client."""
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        cancelled = cancel_request(str(data.get('request_id', '')))
+    except TooManyCancels:
+        return jsonify({
+            'success': False,
+            'error': 'Too many pending cancels, please try again later.'
+        }), 503
+    if not cancelled:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid request id.'
+        }), 400
+    
+    return jsonify({'success': True})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
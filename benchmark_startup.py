@@ -0,0 +1,92 @@
+"""
+Startup benchmark for the Multi-Agent Tourism System.
+
+Measures, in fresh interpreter processes, how long it takes to import the
+Flask app, how long the first TourismAgent construction takes, and the
+resident memory (RSS) at each step. Run it as the agents grow to keep
+cold-start time and per-worker memory visible:
+
+    python benchmark_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Runs inside a fresh interpreter and prints one JSON line of measurements
+PROBE = """
+import json, os, resource, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is a peak value (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+baseline = rss_mb()
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+import_rss = rss_mb()
+app.get_agent()
+built = time.perf_counter()
+
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'agent_ms': (built - imported) * 1000,
+    'baseline_rss_mb': baseline,
+    'import_rss_mb': import_rss,
+    'agent_rss_mb': rss_mb(),
+}))
+"""
+
+
+def run_probe() -> dict:
+    """Run the probe in a fresh interpreter and return its measurements."""
+    env = dict(os.environ)
+    # Measure the lazy path: the probe builds the agent explicitly
+    env.pop('PRELOAD_AGENT', None)
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """Run the benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description='Measure app cold start and per-worker memory.')
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh processes to measure')
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+
+    print("=" * 60)
+    print(f"Startup benchmark ({args.runs} runs)")
+    print("=" * 60)
+    for key, label in [
+        ('import_ms', 'Import app (ms)'),
+        ('agent_ms', 'Build TourismAgent (ms)'),
+        ('baseline_rss_mb', 'RSS before import (MB)'),
+        ('import_rss_mb', 'RSS after import (MB)'),
+        ('agent_rss_mb', 'RSS after agent (MB)'),
+    ]:
+        values = [result[key] for result in results]
+        print(f"{label:<28} median {statistics.median(values):8.1f}   max {max(values):8.1f}")
+
+
+if __name__ == '__main__':
+    main()
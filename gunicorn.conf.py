@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the Multi-Agent Tourism System.
+
+The app and the TourismAgent are loaded once in the master process before
+workers are forked, so workers start fast and share the agent's memory
+copy-on-write instead of each building their own.
+"""
+import os
+
+preload_app = True
+
+# Build the agent at import time in the master (see app.get_agent)
+os.environ.setdefault('PRELOAD_AGENT', '1')
+
+# Threaded workers, so /api/cancel is served while a slow query is in flight
+worker_class = 'gthread'
+threads = 4
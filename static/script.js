@@ -1,40 +1,155 @@
+// Repeat submits of the same query within this window are ignored
+const DEBOUNCE_MS = 1500;
+// Prefix and size limit for answers cached in localStorage
+const CACHE_PREFIX = 'tourism-answer:';
+const CACHE_MAX_ENTRIES = 50;
+
+// The request currently waiting for an answer, if any
+let inFlight = null;
+let lastSubmit = { key: null, time: 0 };
+
+// Normalize a query so trivially different spellings share a cache entry
+function normalizeQuery(query) {
+    return query.toLowerCase().replace(/\s+/g, ' ').replace(/[?!.]+$/, '').trim();
+}
+
+function newRequestId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+}
+
+// Read a cached answer, or null if there is none
+function readCache(key) {
+    try {
+        const raw = localStorage.getItem(CACHE_PREFIX + key);
+        return raw ? JSON.parse(raw) : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Store an answer with its ETag and the lifetime given by Cache-Control
+function writeCache(key, entry) {
+    try {
+        localStorage.setItem(CACHE_PREFIX + key, JSON.stringify(entry));
+        
+        // Evict the oldest answers beyond the size limit
+        const keys = Object.keys(localStorage).filter(k => k.startsWith(CACHE_PREFIX));
+        if (keys.length > CACHE_MAX_ENTRIES) {
+            keys.map(k => [k, (readCache(k.slice(CACHE_PREFIX.length)) || {}).storedAt || 0])
+                .sort((a, b) => a[1] - b[1])
+                .slice(0, keys.length - CACHE_MAX_ENTRIES)
+                .forEach(([k]) => localStorage.removeItem(k));
+        }
+    } catch (error) {
+        // Storage full or unavailable: caching is best effort
+    }
+}
+
+// Seconds an answer may be reused, from the Cache-Control header
+function maxAgeSeconds(response) {
+    const cacheControl = response.headers.get('Cache-Control') || '';
+    if (/no-cache|no-store/.test(cacheControl)) {
+        return 0;
+    }
+    const match = cacheControl.match(/max-age=(\d+)/);
+    return match ? parseInt(match[1], 10) : 0;
+}
+
+// Abort the in-flight request and tell the server to stop its upstream fetches
+function abortInFlight() {
+    if (!inFlight) {
+        return;
+    }
+    const { controller, requestId } = inFlight;
+    inFlight = null;
+    controller.abort();
+    const body = new Blob([JSON.stringify({ request_id: requestId })], { type: 'application/json' });
+    if (!(navigator.sendBeacon && navigator.sendBeacon('/api/cancel', body))) {
+        fetch('/api/cancel', { method: 'POST', body: body, keepalive: true }).catch(() => {});
+    }
+}
+
+function setLoading(loading) {
+    const submitBtn = document.getElementById('submitBtn');
+    const loadingSpinner = document.getElementById('loadingSpinner');
+    loadingSpinner.style.display = loading ? 'inline' : 'none';
+    submitBtn.querySelector('span:first-child').textContent = loading ? 'Processing...' : 'Send';
+}
+
 // Handle form submission
 document.getElementById('queryForm').addEventListener('submit', async (e) => {
     e.preventDefault();
     
     const userInput = document.getElementById('userInput');
     const query = userInput.value.trim();
-    const submitBtn = document.getElementById('submitBtn');
-    const loadingSpinner = document.getElementById('loadingSpinner');
-    const chatMessages = document.getElementById('chatMessages');
     
     if (!query) {
         return;
     }
     
-    // Disable input and show loading
-    userInput.disabled = true;
-    submitBtn.disabled = true;
-    loadingSpinner.style.display = 'inline';
-    submitBtn.querySelector('span:first-child').textContent = 'Processing...';
+    // Debounce: ignore a resubmit of the query already being answered or just sent
+    const key = normalizeQuery(query);
+    const now = Date.now();
+    if ((inFlight && inFlight.key === key) || (lastSubmit.key === key && now - lastSubmit.time < DEBOUNCE_MS)) {
+        return;
+    }
+    lastSubmit = { key: key, time: now };
     
     // Add user message to chat
     addMessage(query, 'user');
     userInput.value = '';
     
+    // A new question replaces the one still waiting for an answer
+    abortInFlight();
+    
+    // A still-fresh cached answer needs no request at all
+    const cached = readCache(key);
+    if (cached && cached.expiresAt > now) {
+        setLoading(false);
+        addMessage(cached.response, 'bot');
+        return;
+    }
+    
+    const request = { key: key, controller: new AbortController(), requestId: newRequestId() };
+    inFlight = request;
+    setLoading(true);
+    
     try {
+        const headers = {
+            'Content-Type': 'application/json',
+            'X-Request-ID': request.requestId,
+        };
+        if (cached && cached.etag) {
+            headers['If-None-Match'] = cached.etag;
+        }
+        
         // Send request to backend
         const response = await fetch('/api/query', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ query: query })
+            headers: headers,
+            body: JSON.stringify({ query: query }),
+            signal: request.controller.signal
         });
         
+        // Unchanged since the cached answer: reuse it for another max-age
+        if (response.status === 304 && cached) {
+            writeCache(key, { ...cached, storedAt: Date.now(), expiresAt: Date.now() + maxAgeSeconds(response) * 1000 });
+            addMessage(cached.response, 'bot');
+            return;
+        }
+        
         const data = await response.json();
         
         if (data.success) {
+            writeCache(key, {
+                response: data.response,
+                etag: response.headers.get('ETag'),
+                storedAt: Date.now(),
+                expiresAt: Date.now() + maxAgeSeconds(response) * 1000
+            });
             // Add bot response to chat
             addMessage(data.response, 'bot');
         } else {
@@ -42,18 +157,27 @@ document.getElementById('queryForm').addEventListener('submit', async (e) => {
             addMessage(`Error: ${data.error}`, 'bot');
         }
     } catch (error) {
+        if (error.name === 'AbortError') {
+            // Superseded by a newer question; nothing to show
+            return;
+        }
         console.error('Error:', error);
         addMessage('Sorry, there was an error processing your request. Please try again.', 'bot');
     } finally {
-        // Re-enable input
-        userInput.disabled = false;
-        submitBtn.disabled = false;
-        loadingSpinner.style.display = 'none';
-        submitBtn.querySelector('span:first-child').textContent = 'Send';
-        userInput.focus();
+        // Only the latest request controls the loading state
+        if (inFlight === request) {
+            inFlight = null;
+        }
+        if (!inFlight) {
+            setLoading(false);
+            userInput.focus();
+        }
     }
 });
 
+// Stop upstream work for a request the user navigated away from
+window.addEventListener('pagehide', abortInFlight);
+
 // Add message to chat
 function addMessage(text, type) {
     const chatMessages = document.getElementById('chatMessages');
@@ -1,6 +1,8 @@
 """
 Test script to verify the system works with the provided examples.
 """
+from datetime import date
+
 from agents.tourism_agent import TourismAgent
 
 
@@ -11,7 +13,9 @@ def test_examples():
     examples = [
         "I'm going to go to Bangalore, let's plan my trip.",
         "I'm going to go to Bangalore, what is the temperature there",
-        "I'm going to go to Bangalore, what is the temperature there? And what are the places I can visit?"
+        "I'm going to go to Bangalore, what is the temperature there? And what are the places I can visit?",
+        "I'm going to Paris, France",
+        "Paris, France and Rome, Italy"
     ]
     
     print("=" * 60)
@@ -28,6 +32,69 @@ def test_examples():
         print("\n" + "-" * 60 + "\n")
 
 
+
+def test_destination_extraction():
+    """Check which queries are treated as multi-stop itineraries (no network needed)."""
+    agent = TourismAgent()
+    
+    cases = [
+        ("I'm going to Paris, France", []),
+        ("Trip to Springfield, Illinois", []),
+        ("Going to Bangalore next Monday and Tuesday", []),
+        ("Delhi to Agra", []),
+        ("Bangalore and Mysore", ["Bangalore", "Mysore"]),
+        ("Bangalore, Mysore and Ooty", ["Bangalore", "Mysore", "Ooty"]),
+        ("Delhi to Agra then Jaipur", ["Delhi", "Agra", "Jaipur"]),
+    ]
+    
+    for query, expected in cases:
+        destinations = agent.extract_destinations(query)
+        assert destinations == expected, f"{query!r}: expected {expected}, got {destinations}"
+        print(f"OK  {query!r} -> {destinations}")
+
+
+
+def test_date_window():
+    """Check date windows and date stripping against fixed days (no network needed)."""
+    agent = TourismAgent()
+    wednesday, saturday, sunday = date(2026, 10, 14), date(2026, 10, 17), date(2026, 10, 18)
+    
+    cases = [
+        ("Bangalore this weekend", wednesday, (saturday, sunday)),
+        ("Bangalore this weekend", saturday, (saturday, sunday)),
+        ("Bangalore this weekend", sunday, (sunday, sunday)),
+        ("Bangalore next weekend", saturday, (date(2026, 10, 24), date(2026, 10, 25))),
+        ("Bangalore next weekend", sunday, (date(2026, 10, 24), date(2026, 10, 25))),
+        ("Bangalore for 0 days", wednesday, None),
+        ("Bangalore next 0 days", wednesday, None),
+        ("Bangalore for 3 days", wednesday, (wednesday, date(2026, 10, 16))),
+        ("Bangalore maybe 2 weeks from now", wednesday, None),
+        ("Bangalore, 3 marvellous days", wednesday, None),
+        ("Bangalore on 20 Oct", wednesday, (date(2026, 10, 20), date(2026, 10, 20))),
+        ("Bangalore on 3 March", wednesday, (date(2027, 3, 3), date(2027, 3, 3))),
+    ]
+    
+    for query, today, expected in cases:
+        window = agent.extract_date_window(query, today=today)
+        assert window == expected, f"{query!r} on {today}: expected {expected}, got {window}"
+        print(f"OK  {query!r} on {today:%a} -> {window}")
+    
+    places = [
+        ("I'm going to Southend on Sea", "Southend on Sea"),
+        ("I'm going to Mysore on Friday", "Mysore"),
+        ("I'm going to go to Bangalore next week", "Bangalore"),
+    ]
+    
+    for query, expected in places:
+        place = agent.extract_place_name(query)
+        assert place == expected, f"{query!r}: expected {expected!r}, got {place!r}"
+        print(f"OK  {query!r} -> {place!r}")
+
+
 if __name__ == "__main__":
+    test_destination_extraction()
+    print()
+    test_date_window()
+    print()
     test_examples()
 
@@ -0,0 +1,151 @@
+"""
+Stale-while-revalidate cache shared by the agents.
+
+Entries are fresh for `ttl` seconds. After that they are still served
+immediately (marked as stale) while a background refresh runs, until
+they reach `max_stale` seconds of age, at which point they must be
+fetched again before use. An upstream outage therefore degrades
+freshness instead of availability.
+"""
+import os
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+
+# (ttl, max_stale) in seconds for each data type
+CACHE_SETTINGS = {
+    "geocode": (24 * 3600, 30 * 24 * 3600),
+    "weather": (10 * 60, 6 * 3600),
+    "forecast": (3600, 12 * 3600),
+    "places": (24 * 3600, 14 * 24 * 3600),
+}
+
+# Default maximum number of entries per cache (least recently used are evicted)
+DEFAULT_MAX_ENTRIES = 1000
+
+# Puts between sweeps that drop entries past their hard expiry
+PURGE_INTERVAL = 100
+
+CacheResult = namedtuple("CacheResult", ["value", "stale", "age"])
+
+# Background refreshes for every cache share one small pool
+_refresh_executor = ThreadPoolExecutor(max_workers=4)
+
+
+def cache_settings(data_type: str) -> tuple:
+    """
+    Get (ttl, max_stale) for a data type, with environment overrides.
+
+    CACHE_TTL_<TYPE> and CACHE_MAX_STALE_<TYPE> (in seconds) override the
+    defaults, e.g. CACHE_MAX_STALE_WEATHER=3600.
+
+    Args:
+        data_type: One of the keys of CACHE_SETTINGS
+
+    Returns:
+        Tuple of (ttl, max_stale) in seconds
+    """
+    ttl, max_stale = CACHE_SETTINGS[data_type]
+    suffix = data_type.upper()
+    ttl = float(os.environ.get(f"CACHE_TTL_{suffix}", ttl))
+    max_stale = float(os.environ.get(f"CACHE_MAX_STALE_{suffix}", max_stale))
+    return ttl, max(ttl, max_stale)
+
+
+class SWRCache:
+    """In-memory LRU cache with stale-while-revalidate semantics."""
+
+    def __init__(self, data_type: str):
+        self.data_type = data_type
+        self.ttl, self.max_stale = cache_settings(data_type)
+        self.max_entries = int(os.environ.get(f"CACHE_MAX_ENTRIES_{data_type.upper()}", DEFAULT_MAX_ENTRIES))
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._refreshing = set()
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value: Any):
+        """Store a freshly fetched value, evicting old entries as needed."""
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+
+            self._puts += 1
+            if self._puts % PURGE_INTERVAL == 0:
+                self._purge_expired()
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _purge_expired(self):
+        """Drop entries past their hard expiry. Caller must hold the lock."""
+        cutoff = time.time() - self.max_stale
+        for key in [key for key, (_, fetched_at) in self._entries.items() if fetched_at <= cutoff]:
+            del self._entries[key]
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        """Reload an entry in the background, keeping the stale value on failure."""
+        try:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+        except Exception as e:
+            print(f"Background refresh error ({self.data_type}): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: Hashable, loader: Callable[[], Any],
+            refresh_loader: Optional[Callable[[], Any]] = None) -> CacheResult:
+        """
+        Get a value, loading or revalidating it as needed.
+
+        Args:
+            key: Cache key
+            loader: Function fetching the value from upstream; returns None on failure
+            refresh_loader: Function used for background refreshes instead of
+                `loader`, e.g. one not tied to the current request's cancellation
+
+        Returns:
+            CacheResult with the value (None if unavailable), whether it is stale,
+            and its age in seconds
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                return CacheResult(value, False, age)
+            if age < self.max_stale:
+                # Serve the stale value now and refresh it in the background
+                with self._lock:
+                    start_refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start_refresh:
+                    _refresh_executor.submit(self._refresh, key, refresh_loader or loader)
+                return CacheResult(value, True, age)
+
+        # Missing or past hard expiry: fetch synchronously
+        value = loader()
+        if value is None:
+            return CacheResult(None, False, 0.0)
+        self.put(key, value)
+        return CacheResult(value, False, 0.0)
+
+    def contains(self, key: Hashable) -> bool:
+        """Check whether a usable (fresh or stale, not hard-expired) entry exists."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and time.time() - entry[1] < self.max_stale
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
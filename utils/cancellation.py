@@ -0,0 +1,111 @@
+"""
+Cancellation of in-flight requests abandoned by the client.
+
+A cancel marker is a file named after the request id in CANCEL_DIR, so a
+cancel received by any gunicorn worker on the host is seen by the worker
+processing the request.
+"""
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+
+CANCEL_DIR = os.environ.get("CANCEL_DIR", os.path.join(tempfile.gettempdir(), "tourism-cancel"))
+
+# Markers older than this are removed (their request has long finished)
+MARKER_MAX_AGE = 600
+
+# Most markers kept at once; further cancels are refused until old ones are pruned
+MAX_MARKERS = int(os.environ.get("CANCEL_MAX_MARKERS", 1000))
+
+# Seconds between sweeps for old markers (per process)
+PRUNE_INTERVAL = 60
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+
+class RequestCancelled(Exception):
+    """Raised when work is abandoned because the client cancelled the request."""
+
+
+class TooManyCancels(Exception):
+    """Raised when a cancel is refused because CANCEL_DIR already holds MAX_MARKERS markers."""
+
+
+_last_prune = 0.0
+
+
+def _marker_path(request_id: str) -> Optional[str]:
+    """Get the marker path for a request id, or None if the id is invalid."""
+    if not request_id or not _REQUEST_ID_PATTERN.match(request_id):
+        return None
+    return os.path.join(CANCEL_DIR, request_id)
+
+
+class CancelToken:
+    """Tells long-running work whether its request has been cancelled."""
+
+    def __init__(self, request_id: str):
+        self.path = _marker_path(request_id)
+        self._cancelled = False
+
+    def is_set(self) -> bool:
+        """Return True once the request has been cancelled."""
+        if not self._cancelled and self.path:
+            self._cancelled = os.path.exists(self.path)
+        return self._cancelled
+
+    def release(self):
+        """Remove the cancel marker once the request has finished."""
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def cancel_request(request_id: str) -> bool:
+    """
+    Mark a request as cancelled.
+
+    Args:
+        request_id: Client-generated id sent with the request
+
+    Returns:
+        True if the marker was written, False if the id is invalid
+
+    Raises:
+        TooManyCancels: If CANCEL_DIR already holds MAX_MARKERS markers
+    """
+    path = _marker_path(request_id)
+    if not path:
+        return False
+
+    os.makedirs(CANCEL_DIR, exist_ok=True)
+    if time.monotonic() - _last_prune >= PRUNE_INTERVAL:
+        _prune_markers()
+
+    # The endpoint is unauthenticated: bound the directory instead of trusting callers
+    if not os.path.exists(path) and len(os.listdir(CANCEL_DIR)) >= MAX_MARKERS:
+        raise TooManyCancels(f"{MAX_MARKERS} cancel markers pending")
+
+    with open(path, "w"):
+        pass
+    return True
+
+
+def _prune_markers():
+    """Remove markers left behind by cancels that arrived after their request finished."""
+    global _last_prune
+    _last_prune = time.monotonic()
+
+    cutoff = time.time() - MARKER_MAX_AGE
+    for name in os.listdir(CANCEL_DIR):
+        marker = os.path.join(CANCEL_DIR, name)
+        try:
+            if os.path.getmtime(marker) < cutoff:
+                os.remove(marker)
+        except OSError:
+            pass
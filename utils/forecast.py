@@ -0,0 +1,113 @@
+"""
+Columnar multi-day forecast series for trip-window weather.
+"""
+import math
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Optional, Dict, List
+
+
+# Open-Meteo serves at most 16 days of forecast
+MAX_FORECAST_DAYS = 16
+
+# Hourly precipitation (mm) above which an hour counts as rainy
+RAIN_HOUR_THRESHOLD = 0.1
+
+
+def _column(values: List, typecode: str = "d") -> array:
+    """Pack a JSON list into a compact array, mapping nulls to NaN."""
+    return array(typecode, (math.nan if v is None else v for v in values))
+
+
+def _valid(values) -> List[float]:
+    """Drop NaN entries."""
+    return [v for v in values if not math.isnan(v)]
+
+
+class ForecastSeries:
+    """Daily and hourly forecast for one location, stored as parallel arrays."""
+
+    def __init__(self, data: Dict):
+        """
+        Build the series from an Open-Meteo response with daily and hourly blocks.
+
+        Args:
+            data: Parsed Open-Meteo JSON response
+        """
+        daily = data["daily"]
+        hourly = data["hourly"]
+
+        self.start = date.fromisoformat(daily["time"][0])
+        self.days = len(daily["time"])
+        self.unit = data.get("daily_units", {}).get("temperature_2m_max", "°C")
+
+        self.temp_max = _column(daily["temperature_2m_max"])
+        self.temp_min = _column(daily["temperature_2m_min"])
+        self.rain_probability = _column(daily["precipitation_probability_max"])
+        self.precipitation = _column(daily["precipitation_sum"])
+
+        # Hourly values are indexed by day offset so a window maps to one slice
+        start_ordinal = self.start.toordinal()
+        self.hour_day = array("H", (date.fromisoformat(t[:10]).toordinal() - start_ordinal
+                                    for t in hourly["time"]))
+        self.hourly_precipitation = _column(hourly["precipitation"])
+
+    @property
+    def end(self) -> date:
+        """Last day covered by the series."""
+        return self.start + timedelta(days=self.days - 1)
+
+    def covers(self, start: date, end: date) -> bool:
+        """Check whether a date window lies within the series."""
+        return self.start <= start <= end <= self.end
+
+    def summarize(self, start: date, end: date, best_count: int = 3) -> Optional[Dict]:
+        """
+        Summarize the forecast over an inclusive date window.
+
+        Args:
+            start: First day of the window
+            end: Last day of the window
+            best_count: Number of best days to return
+
+        Returns:
+            Dictionary with the temperature range, rainy hour count and best days,
+            or None if the window is outside the series
+        """
+        if not self.covers(start, end):
+            return None
+
+        lo = (start - self.start).days
+        hi = (end - self.start).days + 1
+
+        temp_min = _valid(self.temp_min[lo:hi])
+        temp_max = _valid(self.temp_max[lo:hi])
+
+        hour_lo = bisect_left(self.hour_day, lo)
+        hour_hi = bisect_left(self.hour_day, hi)
+        rain_hours = sum(1 for p in self.hourly_precipitation[hour_lo:hour_hi]
+                         if p > RAIN_HOUR_THRESHOLD)
+
+        # Best days: lowest rain chance, then least rain, then closest to 26 degrees
+        scores = [
+            (rain if not math.isnan(rain) else 100.0,
+             mm if not math.isnan(mm) else 0.0,
+             abs(tmax - 26.0) if not math.isnan(tmax) else 100.0,
+             day)
+            for day, rain, mm, tmax in zip(range(lo, hi), self.rain_probability[lo:hi],
+                                           self.precipitation[lo:hi], self.temp_max[lo:hi])
+        ]
+        scores.sort()
+        best_days = [self.start + timedelta(days=day) for *_, day in scores[:best_count]]
+
+        return {
+            "start": start,
+            "end": end,
+            "temp_min": min(temp_min) if temp_min else None,
+            "temp_max": max(temp_max) if temp_max else None,
+            "rain_hours": rain_hours,
+            "rainy_days": sum(1 for mm in self.precipitation[lo:hi] if mm > 1.0),
+            "best_days": sorted(best_days),
+            "unit": self.unit
+        }
@@ -3,9 +3,91 @@ Geocoding utility using Nominatim API to get coordinates for places.
 """
 import requests
 from typing import Optional, Tuple, Dict
+from utils.cache import SWRCache, CacheResult
+
+
+geocode_cache = SWRCache("geocode")
+
+
+def _cache_key(kind: str, place_name: str) -> Tuple[str, str]:
+    """Build a cache key from a normalized place name."""
+    return (kind, " ".join(place_name.lower().split()))
+
+
+def lookup_coordinates(place_name: str) -> CacheResult:
+    """
+    Get cached coordinates for a place, with staleness information.
+    
+    Args:
+        place_name: Name of the place to geocode
+        
+    Returns:
+        CacheResult whose value is (latitude, longitude) or None
+    """
+    return geocode_cache.get(_cache_key("coords", place_name),
+                             lambda: _fetch_coordinates(place_name))
+
+
+def lookup_place(place_name: str) -> CacheResult:
+    """
+    Get cached details for a place, with staleness information.
+    
+    Args:
+        place_name: Name of the place to geocode
+        
+    Returns:
+        CacheResult whose value is a dictionary with "latitude", "longitude",
+        "country", "state" and "type" (Nominatim address type, e.g. "city",
+        "state" or "country"), or None
+    """
+    return geocode_cache.get(_cache_key("place", place_name),
+                             lambda: _fetch_place(place_name))
+
+
+def lookup_coordinates_with_country(place_name: str) -> CacheResult:
+    """
+    Get cached coordinates and country for a place, with staleness information.
+    
+    Args:
+        place_name: Name of the place to geocode
+        
+    Returns:
+        CacheResult whose value is (latitude, longitude, country) or None
+    """
+    result = lookup_place(place_name)
+    if result.value is None:
+        return result
+    place = result.value
+    return result._replace(value=(place["latitude"], place["longitude"], place["country"]))
 
 
 def get_coordinates(place_name: str) -> Optional[Tuple[float, float]]:
+    """
+    Get latitude and longitude for a place, served from the geocode cache.
+    
+    Args:
+        place_name: Name of the place to geocode
+        
+    Returns:
+        Tuple of (latitude, longitude) if found, None otherwise
+    """
+    return lookup_coordinates(place_name).value
+
+
+def get_coordinates_with_country(place_name: str) -> Optional[Tuple[float, float, str]]:
+    """
+    Get coordinates and country for a place, served from the geocode cache.
+    
+    Args:
+        place_name: Name of the place to geocode
+        
+    Returns:
+        Tuple of (latitude, longitude, country) if found, None otherwise
+    """
+    return lookup_coordinates_with_country(place_name).value
+
+
+def _fetch_coordinates(place_name: str) -> Optional[Tuple[float, float]]:
     """
     Get latitude and longitude for a place using Nominatim API.
     Works for any location worldwide. Prioritizes India for ambiguous queries.
@@ -68,16 +150,28 @@ def get_coordinates(place_name: str) -> Optional[Tuple[float, float]]:
         return None
 
 
-def get_coordinates_with_country(place_name: str) -> Optional[Tuple[float, float, str]]:
+def _place_details(result: Dict) -> Dict:
+    """Extract the fields we use from a Nominatim search result."""
+    address = result.get("address", {})
+    return {
+        "latitude": float(result["lat"]),
+        "longitude": float(result["lon"]),
+        "country": address.get("country", "Unknown"),
+        "state": address.get("state", ""),
+        "type": result.get("addresstype") or result.get("type", "")
+    }
+
+
+def _fetch_place(place_name: str) -> Optional[Dict]:
     """
-    Get coordinates and country information for a place.
+    Get coordinates, country and address details for a place.
     Works for any location worldwide. Prioritizes India for ambiguous queries.
     
     Args:
         place_name: Name of the place to geocode
         
     Returns:
-        Tuple of (latitude, longitude, country) if found, None otherwise
+        Dictionary of place details (see lookup_place) if found, None otherwise
     """
     base_url = "https://nominatim.openstreetmap.org/search"
     
@@ -121,10 +215,7 @@ def get_coordinates_with_country(place_name: str) -> Optional[Tuple[float, float
         # Otherwise, if no country hint, prioritize India (for common Indian city names)
         if is_international_city or has_country_hint:
             # Use first result (highest relevance from Nominatim)
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            country = data[0].get("address", {}).get("country", "Unknown")
-            return (lat, lon, country)
+            return _place_details(data[0])
         else:
             # For ambiguous queries, look for India results first
             for result in data:
@@ -132,15 +223,10 @@ def get_coordinates_with_country(place_name: str) -> Optional[Tuple[float, float
                 country = address.get("country", "")
                 
                 if "India" in country or "india" in country.lower():
-                    lat = float(result["lat"])
-                    lon = float(result["lon"])
-                    return (lat, lon, country)
+                    return _place_details(result)
             
             # If no India result, return first result
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            country = data[0].get("address", {}).get("country", "Unknown")
-            return (lat, lon, country)
+            return _place_details(data[0])
         
     except Exception as e:
         print(f"Error in geocoding: {e}")
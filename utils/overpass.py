@@ -0,0 +1,260 @@
+"""
+Overpass API client with multiple endpoints, circuit breakers and hedged requests.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict
+
+import requests
+
+from utils.cancellation import RequestCancelled
+
+
+# Public Overpass mirrors, tried in this order
+DEFAULT_ENDPOINTS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://overpass.private.coffee/api/interpreter",
+]
+
+# Seconds between cancellation checks while waiting for an answer
+CANCEL_POLL_INTERVAL = 0.25
+
+# Callers that may query at once: the gthread request threads plus the
+# background cache refresh workers
+MAX_CONCURRENT_QUERIES = int(os.environ.get("OVERPASS_MAX_CONCURRENT_QUERIES", 8))
+
+
+class EndpointsUnavailable(RuntimeError):
+    """Raised when every endpoint's circuit is open, so no request was sent."""
+
+
+def configured_endpoints() -> List[str]:
+    """
+    Read the Overpass endpoint list from the environment.
+
+    OVERPASS_ENDPOINTS is a comma-separated list of interpreter URLs that
+    replaces the default mirrors. OVERPASS_LOCAL_URL points at a local
+    Overpass instance which is appended as the last-resort stand-in.
+
+    Returns:
+        List of endpoint URLs in priority order
+    """
+    env_endpoints = os.environ.get("OVERPASS_ENDPOINTS", "")
+    endpoints = [url.strip() for url in env_endpoints.split(",") if url.strip()]
+    if not endpoints:
+        endpoints = list(DEFAULT_ENDPOINTS)
+
+    local_url = os.environ.get("OVERPASS_LOCAL_URL", "").strip()
+    if local_url and local_url not in endpoints:
+        endpoints.append(local_url)
+
+    return endpoints
+
+
+class CircuitBreaker:
+    """Stops sending traffic to an endpoint after repeated failures."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        # True while the single half-open trial request is in flight
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def _ready(self) -> bool:
+        """Closed, or open long enough for a trial request that isn't already running."""
+        if self.opened_at is None:
+            return True
+        return not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def may_allow(self) -> bool:
+        """Check, without claiming anything, whether a request could be sent now."""
+        with self._lock:
+            return self._ready()
+
+    def allow_request(self) -> bool:
+        """
+        Claim permission to send a request.
+
+        A closed circuit always allows requests. Once an open circuit's reset
+        timeout has passed, exactly one caller gets the half-open trial; others
+        are refused until that trial succeeds or fails.
+        """
+        with self._lock:
+            if not self._ready():
+                return False
+            if self.opened_at is not None:
+                self.probing = True
+            return True
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        """Count a failure and open the circuit once the threshold is reached."""
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                # A failed trial reopens the circuit for another reset timeout
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class OverpassEndpoint:
+    """A single Overpass interpreter URL with latency tracking."""
+
+    def __init__(self, url: str, default_latency: float = 5.0, window: int = 50):
+        self.url = url
+        self.default_latency = default_latency
+        self.latencies = deque(maxlen=window)
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds: float):
+        """Record the latency of a successful request."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def p95_latency(self) -> float:
+        """
+        Get the 95th percentile latency of recent successful requests.
+
+        Returns:
+            Latency in seconds, or the default latency if there is no history yet
+        """
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return self.default_latency
+        index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+        return samples[index]
+
+
+class OverpassClient:
+    """Runs Overpass queries against a list of endpoints with hedging."""
+
+    def __init__(self, endpoints: Optional[List[str]] = None, timeout: int = 30):
+        urls = endpoints if endpoints else configured_endpoints()
+        self.endpoints = [OverpassEndpoint(url) for url in urls]
+        self.timeout = timeout
+        # Each query runs a primary and at most one hedge, and a losing request
+        # keeps its thread until it finishes; twice that per caller means new
+        # primaries don't queue behind losers from the caller's previous query.
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_QUERIES * 2 * 2)
+
+    def _available_endpoints(self) -> List[OverpassEndpoint]:
+        """Get endpoints whose circuit may currently allow requests, in priority order."""
+        return [endpoint for endpoint in self.endpoints if endpoint.breaker.may_allow()]
+
+    def _post(self, endpoint: OverpassEndpoint, query: str, timeout: float) -> Dict:
+        """Send the query to one endpoint, updating its latency and circuit state."""
+        started = time.monotonic()
+        try:
+            response = requests.post(
+                endpoint.url,
+                data={"data": query},
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            endpoint.breaker.record_failure()
+            raise
+
+        endpoint.record_latency(time.monotonic() - started)
+        endpoint.breaker.record_success()
+        return data
+
+    def query(self, query: str, cancel_token=None, timeout: Optional[float] = None) -> Dict:
+        """
+        Execute an Overpass query, hedging against a second endpoint.
+
+        The query is sent to the first available endpoint. If it hasn't answered
+        within its p95 latency, the same query is sent to the next available
+        endpoint and whichever answers first wins. A failed request falls over
+        to the next endpoint immediately.
+
+        Args:
+            query: Overpass QL query
+            cancel_token: Optional object whose is_set() turns True when the
+                caller no longer needs the result
+            timeout: HTTP timeout in seconds for this query (default: the client's
+                timeout); should match a longer `[timeout:N]` in the query itself
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            EndpointsUnavailable: If every endpoint's circuit is open
+            RuntimeError: If every attempt failed
+            RequestCancelled: If cancel_token was set while waiting
+        """
+        candidates = self._available_endpoints()
+        if not candidates:
+            raise EndpointsUnavailable("All Overpass endpoints are unavailable (circuits open)")
+
+        timeout = timeout or self.timeout
+        pending = {}
+        last_error = None
+        next_index = 0
+
+        def launch() -> Optional[OverpassEndpoint]:
+            """Send the query to the next endpoint whose circuit grants the request."""
+            nonlocal next_index
+            while next_index < len(candidates):
+                endpoint = candidates[next_index]
+                next_index += 1
+                if endpoint.breaker.allow_request():
+                    pending[self._executor.submit(self._post, endpoint, query, timeout)] = endpoint
+                    return endpoint
+            return None
+
+        primary = launch()
+        if primary is None:
+            raise EndpointsUnavailable("All Overpass endpoints are unavailable (circuits open)")
+        hedge_at = time.monotonic() + primary.p95_latency()
+        hedged = False
+
+        while pending:
+            # Wait for the hedge delay only while a single hedge can still be sent
+            can_hedge = not hedged and next_index < len(candidates)
+            wait_for = max(0.0, hedge_at - time.monotonic()) if can_hedge else None
+            if cancel_token is not None:
+                # Wake up regularly to notice cancellation
+                wait_for = CANCEL_POLL_INTERVAL if wait_for is None else min(wait_for, CANCEL_POLL_INTERVAL)
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if cancel_token is not None and cancel_token.is_set():
+                # In-flight HTTP calls can't be interrupted, but stop waiting and hedging
+                raise RequestCancelled("Overpass query cancelled")
+
+            if not done:
+                if can_hedge and time.monotonic() >= hedge_at:
+                    # Primary is slower than usual: hedge with the next endpoint
+                    launch()
+                    hedged = True
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    # Replace the failed request with the next endpoint right away
+                    replacement = launch()
+                    if replacement is not None:
+                        hedge_at = time.monotonic() + replacement.p95_latency()
+
+        raise RuntimeError(f"All Overpass endpoints failed: {last_error}")
@@ -0,0 +1,153 @@
+"""
+Importance ranking for tourist places fetched from OpenStreetMap.
+
+Each element is scored once, when it is fetched. The scores are kept in
+RankedPlaces alongside the names and categories, so answering a different
+limit or category filter is a bounded-heap selection over those arrays
+rather than another Overpass query.
+"""
+import heapq
+import math
+from array import array
+from typing import Dict, List, Optional, Set
+
+
+EARTH_RADIUS_KM = 6371.0
+
+# Search radius used by the Overpass queries
+SEARCH_RADIUS_KM = 25.0
+
+# Maximum number of scored places kept per location
+MAX_RANKED_PLACES = 200
+
+TOURISM_TYPE_SCORES = {
+    "attraction": 20, "museum": 20, "zoo": 20, "theme_park": 20, "gallery": 20,
+    "monument": 15, "viewpoint": 15,
+}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1: Latitude of the first point
+        lon1: Longitude of the first point
+        lat2: Latitude of the second point
+        lon2: Longitude of the second point
+
+    Returns:
+        Distance in kilometres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def element_position(element: Dict) -> Optional[tuple]:
+    """Get (lat, lon) of an Overpass element, using the center for ways and relations."""
+    if "lat" in element and "lon" in element:
+        return element["lat"], element["lon"]
+    center = element.get("center")
+    if center:
+        return center["lat"], center["lon"]
+    return None
+
+
+def score_element(tags: Dict, distance_km: Optional[float]) -> float:
+    """
+    Compute the importance score of an OSM element.
+
+    Combines Wikipedia/Wikidata presence, the tourism type, name keywords,
+    tag richness and distance from the searched location.
+
+    Args:
+        tags: OSM tags of the element
+        distance_km: Distance from the geocoded center, if known
+
+    Returns:
+        Importance score (higher is better)
+    """
+    score = 0.0
+    name_lower = tags.get("name", "").lower()
+
+    # Places notable enough for an encyclopedia entry are usually worth a visit
+    if "wikipedia" in tags:
+        score += 25
+    if "wikidata" in tags:
+        score += 15
+
+    if "tourism" in tags:
+        score += TOURISM_TYPE_SCORES.get(tags["tourism"], 5)
+
+    if any(keyword in name_lower for keyword in ["national park", "palace", "planetarium"]):
+        score += 15
+    elif any(keyword in name_lower for keyword in ["park", "garden", "museum", "zoo"]):
+        score += 10
+
+    if len(name_lower.split()) > 1:  # Multi-word names are often specific places
+        score += 3
+
+    # More tags usually means a better-mapped, better-known place
+    score += min(len(tags), 20) * 0.5
+
+    # Closer places rank higher, fading to nothing at the edge of the search radius
+    if distance_km is not None:
+        score += 20 * max(0.0, 1 - distance_km / SEARCH_RADIUS_KM)
+
+    return score
+
+
+class RankedPlaces:
+    """Scored places for one location, stored as parallel arrays."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        # Every search category that found the place (a garden tagged
+        # tourism=attraction is both a park and an attraction)
+        self.categories: List[Set[str]] = []
+        self.scores = array("d")
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str, category: str, score: float):
+        """Add a place, or add the category to it and keep the higher score if already present."""
+        index = self._index.get(name)
+        if index is None:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            self.categories.append({category})
+            self.scores.append(score)
+        else:
+            self.categories[index].add(category)
+            self.scores[index] = max(self.scores[index], score)
+
+    def trimmed(self, size: int = MAX_RANKED_PLACES) -> "RankedPlaces":
+        """Get a copy holding only the best `size` places."""
+        trimmed = RankedPlaces()
+        for index in heapq.nlargest(size, range(len(self.names)), key=self.scores.__getitem__):
+            for category in self.categories[index]:
+                trimmed.add(self.names[index], category, self.scores[index])
+        return trimmed
+
+    def top(self, limit: int, category: Optional[str] = None) -> List[str]:
+        """
+        Get the best place names, optionally restricted to one category.
+
+        Args:
+            limit: Maximum number of places to return
+            category: Only return places found by this search category
+
+        Returns:
+            Place names ordered by descending score
+        """
+        if category is None:
+            candidates = range(len(self.names))
+        else:
+            candidates = [i for i, found_by in enumerate(self.categories) if category in found_by]
+        best = heapq.nlargest(limit, candidates, key=self.scores.__getitem__)
+        return [self.names[index] for index in best]
@@ -0,0 +1,50 @@
+"""
+Route ordering for multi-destination itineraries.
+"""
+from typing import List, Tuple
+
+from utils.ranking import haversine_km
+
+
+def distance_matrix(points: List[Tuple[float, float]]) -> List[List[float]]:
+    """
+    Compute pairwise great-circle distances.
+
+    Args:
+        points: List of (latitude, longitude) tuples
+
+    Returns:
+        Square matrix of distances in kilometres
+    """
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(i + 1, size):
+            matrix[i][j] = matrix[j][i] = haversine_km(*points[i], *points[j])
+    return matrix
+
+
+def nearest_neighbor_route(matrix: List[List[float]], start: int = 0) -> List[int]:
+    """
+    Order stops with the nearest-neighbor heuristic.
+
+    Starting from `start`, repeatedly travel to the closest unvisited stop.
+
+    Args:
+        matrix: Distance matrix from distance_matrix
+        start: Index of the first stop
+
+    Returns:
+        Stop indices in visiting order
+    """
+    if not matrix:
+        return []
+
+    route = [start]
+    unvisited = set(range(len(matrix))) - {start}
+    while unvisited:
+        current = route[-1]
+        nearest = min(unvisited, key=lambda stop: (matrix[current][stop], stop))
+        route.append(nearest)
+        unvisited.remove(nearest)
+    return route